@@ -1,36 +1,159 @@
 #!/usr/bin/env python3
 # Open Library Book Scraper with CSS Styling
 
-import requests
 import json
-import time
-import csv
+import functools
+import threading
+import string
 import html as html_module
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 import argparse
 
+from common import MAX_REQUESTS_PER_HOST, ijson, json_loads, make_session, map_concurrent, write_csv
+
+_THROTTLE = threading.Semaphore(MAX_REQUESTS_PER_HOST)
+
+@functools.lru_cache(maxsize=1024)
+def _cover_url(covers_url, cover_id, size):
+    return f"{covers_url}/id/{cover_id}-{size}.jpg" if cover_id else None
+
+_CARD_TMPL = string.Template('''
+            <div class="card">
+                <div class="score">$popularity</div>
+                <h2>$title</h2>
+                <p>by $authors</p>
+                <div class="cover">$cover</div>
+                <div class="info">
+                    <p><strong>Year:</strong> $year</p>
+                    <p><strong>Pages:</strong> $pages</p>
+                    <p><strong>Rating:</strong> $rating ($rating_count ratings)</p>
+                    <p><strong>Editions:</strong> $editions</p>
+                    <p><strong>Level:</strong> $level</p>
+                    <p><strong>Status:</strong> $availability</p>
+                    <p><strong>Want to Read:</strong> $want_read</p>
+                    <p><strong>Subjects:</strong> $subjects</p>
+                </div>
+                <a href="$url" target="_blank">View on Open Library</a>
+            </div>
+            ''')
+
+_CSS = """
+body {
+    font-family: Arial, sans-serif;
+    background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
+    padding: 20px;
+}
+.container { max-width: 1200px; margin: 0 auto; }
+.header {
+    background: white;
+    padding: 20px;
+    border-radius: 10px;
+    text-align: center;
+    margin-bottom: 20px;
+}
+.grid {
+    display: grid;
+    grid-template-columns: repeat(auto-fit, minmax(350px, 1fr));
+    gap: 20px;
+}
+.card {
+    background: white;
+    padding: 20px;
+    border-radius: 10px;
+    box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+    position: relative;
+}
+.card:hover { transform: translateY(-5px); transition: 0.3s; }
+.score {
+    position: absolute;
+    top: 10px;
+    right: 10px;
+    background: #e74c3c;
+    color: white;
+    padding: 8px 12px;
+    border-radius: 20px;
+    font-weight: bold;
+}
+.card h2 { color: #2c3e50; font-size: 1.3em; margin-bottom: 5px; }
+.card p { margin: 8px 0; color: #555; }
+.cover { text-align: center; margin: 15px 0; }
+.cover img { max-width: 100px; border-radius: 5px; box-shadow: 0 2px 4px rgba(0,0,0,0.2); }
+.no-cover {
+    width: 100px;
+    height: 150px;
+    background: #95a5a6;
+    display: inline-flex;
+    align-items: center;
+    justify-content: center;
+    border-radius: 5px;
+    color: white;
+    font-weight: bold;
+}
+.card a {
+    display: inline-block;
+    margin-top: 10px;
+    padding: 8px 15px;
+    background: #3498db;
+    color: white;
+    text-decoration: none;
+    border-radius: 5px;
+}
+.card a:hover { background: #2980b9; }
+.info { margin-top: 10px; }
+strong { color: #2c3e50; }
+"""
+
+_PAGE_HEAD = string.Template('''<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Open Library Books</title>
+    <style>$css    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>📚 Open Library Books</h1>
+            <p>Query: $query</p>
+            <p>Found $total books | Showing $shown</p>
+            <p style="font-size: 0.9em; color: #777;">Generated: $generated</p>
+        </div>
+        <div class="grid">
+            ''')
+
+_PAGE_FOOT = '''
+        </div>
+    </div>
+</body>
+</html>'''
+
 class OpenLibraryBookScraper:
+    __slots__ = ('base_url', 'covers_url', 'session', '_fields_param')
+
+    available_fields = (
+        'key', 'title', 'subtitle', 'author_name', 'author_key',
+        'cover_i', 'first_publish_year', 'publish_year', 'publisher',
+        'isbn', 'isbn13', 'subject', 'language', 'number_of_pages_median',
+        'ratings_average', 'ratings_count', 'want_to_read_count',
+        'currently_reading_count', 'already_read_count', 'readinglog_count',
+        'edition_count', 'lc_classifications', 'dewey_decimal_class',
+        'ia', 'has_fulltext', 'public_scan_b', 'lending_edition_s'
+    )
+
     def __init__(self):
         self.base_url = "https://openlibrary.org/search.json"
         self.covers_url = "https://covers.openlibrary.org/b"
-        self.session = requests.Session()
-        self.session.headers.update({'User-Agent': 'OpenLibraryBookScraper/1.0'})
-
-        self.available_fields = [
-            'key', 'title', 'subtitle', 'author_name', 'author_key',
-            'cover_i', 'first_publish_year', 'publish_year', 'publisher',
-            'isbn', 'isbn13', 'subject', 'language', 'number_of_pages_median',
-            'ratings_average', 'ratings_count', 'want_to_read_count',
-            'currently_reading_count', 'already_read_count', 'readinglog_count',
-            'edition_count', 'lc_classifications', 'dewey_decimal_class',
-            'ia', 'has_fulltext', 'public_scan_b', 'lending_edition_s'
-        ]
+        self.session = make_session('OpenLibraryBookScraper/1.0')
+        self._fields_param = ','.join(self.available_fields)
 
     def search_books(self, query="", author="", title="", subject="", limit=10, language=""):
+        if not any((query, author, title, subject, language)):
+            return {"docs": [], "numFound": 0}
+
         params = {
             'limit': min(limit, 100),
-            'fields': ','.join(self.available_fields)
+            'fields': self._fields_param
         }
 
         query_parts = []
@@ -40,20 +163,32 @@ class OpenLibraryBookScraper:
         if subject: query_parts.append(f'subject:"{subject}"')
         if language: query_parts.append(f'language:{language}')
 
-        params['q'] = ' AND '.join(query_parts) if query_parts else '*'
+        params['q'] = ' AND '.join(query_parts)
 
         try:
             print(f"Searching: {params['q']}")
-            response = self.session.get(self.base_url, params=params, timeout=30)
-            response.raise_for_status()
-            time.sleep(0.5)
-            return response.json()
+            with _THROTTLE, self.session.get(self.base_url, params=params, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                return self._read_results(response)
         except Exception as e:
             print(f"Error: {e}")
             return {"docs": [], "numFound": 0}
 
+    def _read_results(self, response):
+        if ijson is None:
+            return json_loads(response.content)
+        response.raw.decode_content = True
+        results = {"docs": [], "numFound": 0}
+        for key, value in ijson.kvitems(response.raw, '', use_float=True):
+            if key in results:
+                results[key] = value
+        return results
+
+    def search_many(self, queries, limit=10):
+        return map_concurrent(lambda q: self.search_books(q, limit=limit), queries)
+
     def get_cover_url(self, cover_id, size="M"):
-        return f"{self.covers_url}/id/{cover_id}-{size}.jpg" if cover_id else None
+        return _cover_url(self.covers_url, cover_id, size)
 
     def calculate_popularity(self, book):
         score = 0.0
@@ -74,181 +209,97 @@ class OpenLibraryBookScraper:
 
         return round(score, 2)
 
-    def get_availability(self, book):
-        if book.get('has_fulltext'): return "Full Text Available"
-        if book.get('lending_edition_s'): return "Available for Lending"
-        if book.get('public_scan_b'): return "Public Scan Available"
-        if book.get('ia'): return "Archive.org Available"
+    @staticmethod
+    @functools.lru_cache(maxsize=16)
+    def get_availability(has_fulltext, lending, public_scan, ia):
+        if has_fulltext: return "Full Text Available"
+        if lending: return "Available for Lending"
+        if public_scan: return "Public Scan Available"
+        if ia: return "Archive.org Available"
         return "Metadata Only"
 
-    def get_reading_level(self, book):
-        pages = book.get('number_of_pages_median', 0)
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def get_reading_level(pages):
         if pages > 800: return "Advanced"
         if pages > 400: return "Intermediate"
         return "Beginner"
 
     def format_book(self, book):
+        g = book.get
+        key = g('key', '')
         return {
-            'key': book.get('key', ''),
-            'url': f"https://openlibrary.org{book.get('key', '')}",
-            'title': book.get('title', 'Unknown'),
-            'subtitle': book.get('subtitle', ''),
-            'authors': book.get('author_name', []),
-            'first_year': book.get('first_publish_year'),
-            'publishers': book.get('publisher', []),
-            'pages': book.get('number_of_pages_median'),
-            'isbn': book.get('isbn', []),
-            'subjects': book.get('subject', []),
-            'cover_url': self.get_cover_url(book.get('cover_i')),
-            'rating': book.get('ratings_average'),
-            'rating_count': book.get('ratings_count'),
-            'want_read': book.get('want_to_read_count', 0),
-            'reading_now': book.get('currently_reading_count', 0),
-            'have_read': book.get('already_read_count', 0),
-            'editions': book.get('edition_count', 0),
+            'key': key,
+            'url': f"https://openlibrary.org{key}",
+            'title': g('title', 'Unknown'),
+            'subtitle': g('subtitle', ''),
+            'authors': g('author_name', []),
+            'first_year': g('first_publish_year'),
+            'publishers': g('publisher', []),
+            'pages': g('number_of_pages_median'),
+            'isbn': g('isbn', []),
+            'subjects': g('subject', []),
+            'cover_url': self.get_cover_url(g('cover_i')),
+            'rating': g('ratings_average'),
+            'rating_count': g('ratings_count'),
+            'want_read': g('want_to_read_count', 0),
+            'reading_now': g('currently_reading_count', 0),
+            'have_read': g('already_read_count', 0),
+            'editions': g('edition_count', 0),
             'popularity': self.calculate_popularity(book),
-            'availability': self.get_availability(book),
-            'level': self.get_reading_level(book)
+            'availability': self.get_availability(
+                bool(g('has_fulltext')), bool(g('lending_edition_s')), bool(g('public_scan_b')), bool(g('ia'))
+            ),
+            'level': self.get_reading_level(g('number_of_pages_median', 0))
         }
 
-    def generate_html(self, books, query="", total=0):
-        cards_html = ""
-        for book in books:
-            authors = ', '.join(book['authors']) if book['authors'] else 'Unknown'
-            cover_html = f'<img src="{book["cover_url"]}">' if book["cover_url"] else '<div class="no-cover">No Cover</div>'
-            subjects_html = ', '.join(book['subjects'][:5]) if book['subjects'] else 'None'
+    def format_books(self, docs):
+        return [self.format_book(b) for b in docs]
 
-            cards_html += f'''
-            <div class="card">
-                <div class="score">{book["popularity"]}</div>
-                <h2>{html_module.escape(book["title"])}</h2>
-                <p>by {html_module.escape(authors)}</p>
-                <div class="cover">{cover_html}</div>
-                <div class="info">
-                    <p><strong>Year:</strong> {book["first_year"] or "Unknown"}</p>
-                    <p><strong>Pages:</strong> {book["pages"] or "Unknown"}</p>
-                    <p><strong>Rating:</strong> {book["rating"] or "N/A"} ({book["rating_count"] or 0} ratings)</p>
-                    <p><strong>Editions:</strong> {book["editions"]}</p>
-                    <p><strong>Level:</strong> {book["level"]}</p>
-                    <p><strong>Status:</strong> {book["availability"]}</p>
-                    <p><strong>Want to Read:</strong> {book["want_read"]}</p>
-                    <p><strong>Subjects:</strong> {html_module.escape(subjects_html)}</p>
-                </div>
-                <a href="{book["url"]}" target="_blank">View on Open Library</a>
-            </div>
-            '''
+    def _card_fields(self, book):
+        authors = ', '.join(book['authors']) if book['authors'] else 'Unknown'
+        subjects = ', '.join(book['subjects'][:5]) if book['subjects'] else 'None'
+        cover_url = book['cover_url']
+        return {
+            'popularity': book['popularity'],
+            'title': html_module.escape(book['title']),
+            'authors': html_module.escape(authors),
+            'cover': f'<img src="{cover_url}">' if cover_url else '<div class="no-cover">No Cover</div>',
+            'year': book['first_year'] or "Unknown",
+            'pages': book['pages'] or "Unknown",
+            'rating': book['rating'] or "N/A",
+            'rating_count': book['rating_count'] or 0,
+            'editions': book['editions'],
+            'level': book['level'],
+            'availability': book['availability'],
+            'want_read': book['want_read'],
+            'subjects': html_module.escape(subjects),
+            'url': book['url']
+        }
 
-        html = f'''<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Open Library Books</title>
-    <style>
-        body {{
-            font-family: Arial, sans-serif;
-            background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
-            padding: 20px;
-        }}
-        .container {{ max-width: 1200px; margin: 0 auto; }}
-        .header {{
-            background: white;
-            padding: 20px;
-            border-radius: 10px;
-            text-align: center;
-            margin-bottom: 20px;
-        }}
-        .grid {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(350px, 1fr));
-            gap: 20px;
-        }}
-        .card {{
-            background: white;
-            padding: 20px;
-            border-radius: 10px;
-            box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-            position: relative;
-        }}
-        .card:hover {{ transform: translateY(-5px); transition: 0.3s; }}
-        .score {{
-            position: absolute;
-            top: 10px;
-            right: 10px;
-            background: #e74c3c;
-            color: white;
-            padding: 8px 12px;
-            border-radius: 20px;
-            font-weight: bold;
-        }}
-        .card h2 {{ color: #2c3e50; font-size: 1.3em; margin-bottom: 5px; }}
-        .card p {{ margin: 8px 0; color: #555; }}
-        .cover {{ text-align: center; margin: 15px 0; }}
-        .cover img {{ max-width: 100px; border-radius: 5px; box-shadow: 0 2px 4px rgba(0,0,0,0.2); }}
-        .no-cover {{
-            width: 100px;
-            height: 150px;
-            background: #95a5a6;
-            display: inline-flex;
-            align-items: center;
-            justify-content: center;
-            border-radius: 5px;
-            color: white;
-            font-weight: bold;
-        }}
-        .card a {{
-            display: inline-block;
-            margin-top: 10px;
-            padding: 8px 15px;
-            background: #3498db;
-            color: white;
-            text-decoration: none;
-            border-radius: 5px;
-        }}
-        .card a:hover {{ background: #2980b9; }}
-        .info {{ margin-top: 10px; }}
-        strong {{ color: #2c3e50; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <h1>📚 Open Library Books</h1>
-            <p>Query: {html_module.escape(query) if query else "All Books"}</p>
-            <p>Found {total} books | Showing {len(books)}</p>
-            <p style="font-size: 0.9em; color: #777;">Generated: {datetime.now().strftime("%Y-%m-%d %H:%M")}</p>
-        </div>
-        <div class="grid">
-            {cards_html}
-        </div>
-    </div>
-</body>
-</html>'''
-        return html
+    def write_html(self, f, books, query="", total=0):
+        f.write(_PAGE_HEAD.substitute(
+            css=_CSS,
+            query=html_module.escape(query) if query else "All Books",
+            total=total,
+            shown=len(books),
+            generated=datetime.now().strftime("%Y-%m-%d %H:%M")
+        ))
+        for book in books:
+            f.write(_CARD_TMPL.substitute(self._card_fields(book)))
+        f.write(_PAGE_FOOT)
 
     def save_csv(self, books, filename="books.csv"):
         if not books: return
 
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            fields = ['title', 'authors', 'first_year', 'publishers', 'pages',
-                     'rating', 'popularity', 'availability', 'level', 'url']
-            writer = csv.DictWriter(f, fieldnames=fields)
-            writer.writeheader()
-
-            for book in books:
-                row = {
-                    'title': book['title'],
-                    'authors': '; '.join(book['authors']),
-                    'first_year': book['first_year'],
-                    'publishers': '; '.join(book['publishers'][:2]),
-                    'pages': book['pages'],
-                    'rating': book['rating'],
-                    'popularity': book['popularity'],
-                    'availability': book['availability'],
-                    'level': book['level'],
-                    'url': book['url']
-                }
-                writer.writerow(row)
-        print(f"✅ CSV saved: {filename}")
+        fields = ['title', 'authors', 'first_year', 'publishers', 'pages',
+                  'rating', 'popularity', 'availability', 'level', 'url']
+        write_csv(filename, fields, (
+            (book['title'], '; '.join(book['authors']), book['first_year'],
+             '; '.join(book['publishers'][:2]), book['pages'], book['rating'],
+             book['popularity'], book['availability'], book['level'], book['url'])
+            for book in books
+        ))
 
     def run_interactive(self):
         print("\n" + "="*60)
@@ -258,11 +309,13 @@ class OpenLibraryBookScraper:
         author = input("Author: ").strip()
         title = input("Title: ").strip()
         subject = input("Subject: ").strip()
+        if not any((query, author, title, subject)):
+            print("❌ Query is required!")
+            return
 
-        try:
-            limit = int(input("How many books (default 10): ").strip() or "10")
-        except:
-            limit = 10
+        raw = input("How many books (default 10): ").strip()
+        limit = int(raw) if raw.isdecimal() else 0
+        limit = min(limit, 100) if limit > 0 else 10
 
         print("\n🔍 Searching...")
         results = self.search_books(query, author, title, subject, limit)
@@ -271,15 +324,15 @@ class OpenLibraryBookScraper:
             print("❌ No books found!")
             return
 
-        books = [self.format_book(b) for b in results['docs']]
+        books = self.format_books(results['docs'])
         search_query = ' '.join(filter(None, [query, author, title, subject]))
 
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         html_file = f"books_{timestamp}.html"
         csv_file = f"books_{timestamp}.csv"
 
-        with open(html_file, 'w', encoding='utf-8') as f:
-            f.write(self.generate_html(books, search_query, results['numFound']))
+        with open(html_file, 'w', encoding='utf-8', buffering=1 << 16) as f:
+            self.write_html(f, books, search_query, results['numFound'])
 
         self.save_csv(books, csv_file)
 
@@ -304,11 +357,11 @@ def main():
     else:
         results = scraper.search_books(args.query, args.author or "", args.title or "", "", args.limit)
         if results['docs']:
-            books = [scraper.format_book(b) for b in results['docs']]
+            books = scraper.format_books(results['docs'])
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
-            with open(f"books_{timestamp}.html", 'w', encoding='utf-8') as f:
-                f.write(scraper.generate_html(books, args.query, results['numFound']))
+            with open(f"books_{timestamp}.html", 'w', encoding='utf-8', buffering=1 << 16) as f:
+                scraper.write_html(f, books, args.query, results['numFound'])
             scraper.save_csv(books, f"books_{timestamp}.csv")
             print(f"✅ Done! Found {len(books)} books")
 
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# Shared helpers for the Open Library and Google Books scrapers
+
+import csv
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry, make_headers
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+MAX_WORKERS = 8
+# In-flight requests allowed per API host, counted from request start until the
+# body has been read; kept below MAX_WORKERS so fan-out cannot flood one host.
+MAX_REQUESTS_PER_HOST = 4
+
+def make_session(user_agent):
+    session = requests.Session()
+    session.mount('https://', HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=max(10, MAX_WORKERS),
+        max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=(429, 500, 502, 503, 504))
+    ))
+    session.headers.update({
+        'User-Agent': user_agent,
+        'Accept': 'application/json',
+        'Accept-Encoding': make_headers(accept_encoding=True)['accept-encoding']
+    })
+    return session
+
+def map_concurrent(fn, items):
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        return list(ex.map(fn, items))
+
+def write_csv(filename, header, rows):
+    with open(filename, 'w', newline='', encoding='utf-8', buffering=1 << 16) as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+    print(f"✅ CSV saved: {filename}")
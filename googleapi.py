@@ -1,13 +1,87 @@
 #!/usr/bin/env python3
 # Google Books API Scraper with CSS Styling
 
-import requests
 import json
-import time
-import csv
+import string
+import threading
 from datetime import datetime
 import argparse
 import html as html_module
+from itertools import islice
+
+from common import MAX_REQUESTS_PER_HOST, ijson, json_loads, make_session, map_concurrent, write_csv
+
+_SESSION = make_session('GoogleBooksScraper/1.0')
+_THROTTLE = threading.Semaphore(MAX_REQUESTS_PER_HOST)
+
+_FIELDS = (
+    "totalItems,items(volumeInfo(title,subtitle,authors,publisher,publishedDate,pageCount,"
+    "categories,description,language,industryIdentifiers,previewLink,infoLink,"
+    "imageLinks/thumbnail,averageRating,ratingsCount),saleInfo(saleability,retailPrice))"
+)
+
+_CARD_TMPL = string.Template('''
+    <div class="card">
+      <div class="score">$popularity</div>
+      <div class="cover">$img</div>
+      <h2>$title</h2>
+      <div class="meta">$authors, $publisher | $published</div>
+      <div>$preview_link</div>
+      <div class="chips">$cats</div>
+      <p class="meta">Pages: $pages | $rating</p>
+      <p class="meta">ISBN(s): $isbns</p>
+      <p>$desc</p>
+    </div>
+    ''')
+
+_CSS = """
+body {font-family:Arial,sans-serif;background:linear-gradient(135deg,#f5f7fa 0%,#c3cfe2 100%);padding:20px;}
+.container {max-width:1200px;margin:0 auto;}
+.header {background:white;padding:20px;border-radius:10px;text-align:center;margin-bottom:20px;}
+.grid {display:grid;grid-template-columns:repeat(auto-fit,minmax(350px,1fr));gap:20px;}
+.card {background:white;padding:20px;border-radius:10px;box-shadow:0 4px 6px rgba(0,0,0,0.1);position:relative;}
+.card h2 {color:#2c3e50;font-size:1.2em;margin-bottom:4px;}
+.card p {color:#555;margin:6px 0;}
+.score {position:absolute;top:10px;right:10px;background:#e67e22;color:white;padding:7px 14px;border-radius:18px;font-weight:bold;}
+.cover {text-align:center;margin:10px 0;}
+.cover img {max-width:100px;border-radius:6px;box-shadow:0 2px 4px rgba(0,0,0,0.18);}
+.no-cover {width:100px;height:150px;background:#95a5a6;display:inline-flex;align-items:center;justify-content:center;border-radius:5px;color:white;font-weight:bold;}
+.meta {font-size:0.95em;color:#888;}
+.chips {margin-top:7px;}
+.chip {background:#d1eaff;color:#2c3e50;padding:4px 9px;border-radius:12px;font-size:0.85em;margin-right:7px;display:inline-block;}
+a.link {color:#337ab7;text-decoration:none;}
+a.link:hover {text-decoration: underline;}
+"""
+
+_ISBN_KEYS = {"ISBN_13": "isbn_13", "ISBN_10": "isbn_10"}
+
+_PAGE_HEAD = string.Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<title>Google Books Results</title>
+<style>$css</style>
+</head>
+<body>
+<div class="container">
+  <div class="header">
+    <h1>📚 Google Books Explorer</h1>
+    <p>Query: <b>$query</b></p>
+    <p>Found $total | Showing $shown</p>
+    <p style='font-size:.97em;color:#888;'>Generated: $generated</p>
+  </div>
+  <div class="grid">""")
+
+_PAGE_FOOT = """</div>
+</div>
+</body></html>
+"""
+
+def _iter_items(resp):
+    if ijson is None:
+        return iter(json_loads(resp.content).get('items', []))
+    resp.raw.decode_content = True
+    return ijson.items(resp.raw, 'items.item', use_float=True)
 
 def fetch_books(query, limit=10, api_key=None, langRestrict=None):
     books = []
@@ -16,7 +90,8 @@ def fetch_books(query, limit=10, api_key=None, langRestrict=None):
     params = {
         "q": query,
         "maxResults": min(max_books, 40),
-        "printType": "books"
+        "printType": "books",
+        "fields": _FIELDS
     }
     if langRestrict:
         params["langRestrict"] = langRestrict
@@ -24,52 +99,49 @@ def fetch_books(query, limit=10, api_key=None, langRestrict=None):
         params["key"] = api_key
     try:
         print(f"Searching Google Books: {query}")
-        resp = requests.get(url, params=params, timeout=30)
-        resp.raise_for_status()
-        data = resp.json()
-        if 'items' not in data:
-            return []
-        for item in data['items'][:limit]:
-            info = item.get('volumeInfo', {})
-            sale = item.get('saleInfo', {})
-            b = {
-                "title": info.get("title", ""),
-                "subtitle": info.get("subtitle", ""),
-                "authors": info.get("authors", []),
-                "publisher": info.get("publisher"),
-                "publishedDate": info.get("publishedDate"),
-                "pageCount": info.get("pageCount"),
-                "categories": info.get("categories", []),
-                "description": info.get("description", ""),
-                "language": info.get("language"),
-                "isbn_10": None,
-                "isbn_13": None,
-                "other_ids": [],
-                "previewLink": info.get("previewLink"),
-                "infoLink": info.get("infoLink"),
-                "image_url": info.get("imageLinks", {}).get("thumbnail"),
-                "avg_rating": info.get("averageRating"),
-                "ratings_count": info.get("ratingsCount"),
-                "saleability": sale.get("saleability"),
-                "price": None,
-            }
-            if "industryIdentifiers" in info:
-                for id_type in info["industryIdentifiers"]:
-                    if id_type["type"] == "ISBN_13":
-                        b["isbn_13"] = id_type["identifier"]
-                    elif id_type["type"] == "ISBN_10":
-                        b["isbn_10"] = id_type["identifier"]
+        with _THROTTLE, _SESSION.get(url, params=params, timeout=30, stream=True) as resp:
+            resp.raise_for_status()
+            for item in islice(_iter_items(resp), limit):
+                info = item.get('volumeInfo', {})
+                sale = item.get('saleInfo', {})
+                b = {
+                    "title": info.get("title", ""),
+                    "subtitle": info.get("subtitle", ""),
+                    "authors": info.get("authors", []),
+                    "publisher": info.get("publisher"),
+                    "publishedDate": info.get("publishedDate"),
+                    "pageCount": info.get("pageCount"),
+                    "categories": info.get("categories", []),
+                    "description": info.get("description", ""),
+                    "language": info.get("language"),
+                    "isbn_10": None,
+                    "isbn_13": None,
+                    "other_ids": [],
+                    "previewLink": info.get("previewLink"),
+                    "infoLink": info.get("infoLink"),
+                    "image_url": info.get("imageLinks", {}).get("thumbnail"),
+                    "avg_rating": info.get("averageRating"),
+                    "ratings_count": info.get("ratingsCount"),
+                    "saleability": sale.get("saleability"),
+                    "price": None,
+                }
+                for id_type in info.get("industryIdentifiers", ()):
+                    key = _ISBN_KEYS.get(id_type["type"])
+                    if key:
+                        b[key] = id_type["identifier"]
                     else:
                         b["other_ids"].append(id_type["identifier"])
-            if "retailPrice" in sale and "amount" in sale["retailPrice"]:
-                b["price"] = sale["retailPrice"]["amount"]
-            books.append(b)
-        time.sleep(0.3)
+                if "retailPrice" in sale and "amount" in sale["retailPrice"]:
+                    b["price"] = sale["retailPrice"]["amount"]
+                books.append(b)
         return books
     except Exception as e:
         print(f"Error: {e}")
         return []
 
+def fetch_books_many(queries, limit=10, api_key=None, langRestrict=None):
+    return map_concurrent(lambda q: fetch_books(q, limit, api_key, langRestrict), queries)
+
 def calculate_popularity(book):
     score = 0
     if book["avg_rating"]:
@@ -82,83 +154,55 @@ def calculate_popularity(book):
         score += 10
     return round(score, 2)
 
-def make_css():
-    return """
-body {font-family:Arial,sans-serif;background:linear-gradient(135deg,#f5f7fa 0%,#c3cfe2 100%);padding:20px;}
-.container {max-width:1200px;margin:0 auto;}
-.header {background:white;padding:20px;border-radius:10px;text-align:center;margin-bottom:20px;}
-.grid {display:grid;grid-template-columns:repeat(auto-fit,minmax(350px,1fr));gap:20px;}
-.card {background:white;padding:20px;border-radius:10px;box-shadow:0 4px 6px rgba(0,0,0,0.1);position:relative;}
-.card h2 {color:#2c3e50;font-size:1.2em;margin-bottom:4px;}
-.card p {color:#555;margin:6px 0;}
-.score {position:absolute;top:10px;right:10px;background:#e67e22;color:white;padding:7px 14px;border-radius:18px;font-weight:bold;}
-.cover {text-align:center;margin:10px 0;}
-.cover img {max-width:100px;border-radius:6px;box-shadow:0 2px 4px rgba(0,0,0,0.18);}
-.no-cover {width:100px;height:150px;background:#95a5a6;display:inline-flex;align-items:center;justify-content:center;border-radius:5px;color:white;font-weight:bold;}
-.meta {font-size:0.95em;color:#888;}
-.chips {margin-top:7px;}
-.chip {background:#d1eaff;color:#2c3e50;padding:4px 9px;border-radius:12px;font-size:0.85em;margin-right:7px;display:inline-block;}
-a.link {color:#337ab7;text-decoration:none;}
-a.link:hover {text-decoration: underline;}
-"""
-
 def make_card(book):
-    authors = ', '.join(book['authors']) if book['authors'] else 'Unknown'
-    cats = ''.join(f'<span class="chip">{html_module.escape(c)}</span>' for c in book.get('categories', [])[:5])
-    rating = f'{book["avg_rating"]}⭐ ({book["ratings_count"]})' if book["avg_rating"] else "No ratings"
-    desc = book["description"][:300] + ("..." if book["description"] and len(book["description"]) > 300 else "")
+    title, author_list, categories = book["title"], book["authors"], book.get("categories", [])
+    avg_rating, ratings_count, description = book["avg_rating"], book["ratings_count"], book["description"]
+    authors = ', '.join(author_list) if author_list else 'Unknown'
+    cats = ''.join(f'<span class="chip">{html_module.escape(c)}</span>' for c in categories[:5])
+    rating = f'{avg_rating}⭐ ({ratings_count})' if avg_rating else "No ratings"
+    desc = description[:300] + ("..." if description and len(description) > 300 else "")
     isbns = " / ".join(filter(None, [book["isbn_10"], book["isbn_13"]]))
     preview_link = f'<a class="link" href="{book["infoLink"] or book["previewLink"]}" target="_blank">View</a>'
-    img = f'<img src="{book["image_url"]}" alt="Cover">' if book["image_url"] else "<div class='cover'>No Cover</div>"
-    return f'''
-    <div class="card">
-      <div class="score">{calculate_popularity(book)}</div>
-      <div class="cover">{img}</div>
-      <h2>{html_module.escape(book["title"])}</h2>
-      <div class="meta">{html_module.escape(authors)}, {html_module.escape(book.get("publisher") or "")} | {html_module.escape(str(book.get("publishedDate") or ""))}</div>
-      <div>{preview_link}</div>
-      <div class="chips">{cats}</div>
-      <p class="meta">Pages: {book["pageCount"] or "?"} | {rating}</p>
-      <p class="meta">ISBN(s): {isbns}</p>
-      <p>{desc}</p>
-    </div>
-    '''
+    image_url = book["image_url"]
+    img = f'<img src="{image_url}" alt="Cover">' if image_url else "<div class='cover'>No Cover</div>"
+    return _CARD_TMPL.substitute(
+        popularity=calculate_popularity(book),
+        img=img,
+        title=html_module.escape(title),
+        authors=html_module.escape(authors),
+        publisher=html_module.escape(book.get("publisher") or ""),
+        published=html_module.escape(str(book.get("publishedDate") or "")),
+        preview_link=preview_link,
+        cats=cats,
+        pages=book["pageCount"] or "?",
+        rating=rating,
+        isbns=isbns,
+        desc=desc
+    )
 
 def save_csv(books, filename):
     fields = ['title','subtitle','authors','publisher','publishedDate','pageCount','categories','language','isbn_10','isbn_13','avg_rating','ratings_count','previewLink','infoLink','popularity']
-    with open(filename, 'w', newline='', encoding='utf-8') as f:
-        w = csv.DictWriter(f, fieldnames=fields)
-        w.writeheader()
+    write_csv(filename, fields, (
+        (b['title'], b['subtitle'], '; '.join(b['authors']), b['publisher'], b['publishedDate'],
+         b['pageCount'], '; '.join(b['categories']), b['language'], b['isbn_10'], b['isbn_13'],
+         b['avg_rating'], b['ratings_count'], b['previewLink'], b['infoLink'], calculate_popularity(b))
+        for b in books
+    ))
+
+def save_html(books, q, total, timestamp=None):
+    now = datetime.now()
+    fname = f"google_books_{timestamp or now.strftime('%Y%m%d_%H%M%S')}.html"
+    with open(fname, "w", encoding="utf-8", buffering=1 << 16) as f:
+        f.write(_PAGE_HEAD.substitute(
+            css=_CSS,
+            query=html_module.escape(q),
+            total=total,
+            shown=len(books),
+            generated=now.strftime('%Y-%m-%d %H:%M')
+        ))
         for b in books:
-            row = {k:( '; '.join(b[k]) if isinstance(b[k],list) else b[k]) if k in b else "" for k in fields}
-            row['popularity'] = calculate_popularity(b)
-            w.writerow(row)
-    print(f"✅ CSV saved: {filename}")
-
-def save_html(books, q, total):
-    cards = "".join(make_card(b) for b in books)
-    s = f"""<!DOCTYPE html>
-<html>
-<head>
-<meta charset="UTF-8">
-<title>Google Books Results</title>
-<style>{make_css()}</style>
-</head>
-<body>
-<div class="container">
-  <div class="header">
-    <h1>📚 Google Books Explorer</h1>
-    <p>Query: <b>{html_module.escape(q)}</b></p>
-    <p>Found {total} | Showing {len(books)}</p>
-    <p style='font-size:.97em;color:#888;'>Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}</p>
-  </div>
-  <div class="grid">{cards}</div>
-</div>
-</body></html>
-"""
-    fname = f"google_books_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
-    with open(fname, "w", encoding="utf-8") as f:
-        f.write(s)
+            f.write(make_card(b))
+        f.write(_PAGE_FOOT)
     print(f"✅ HTML page saved: {fname}")
 
 def run_interactive():
@@ -169,11 +213,9 @@ def run_interactive():
     if not query:
         print("❌ Query is required!")
         return
-    try:
-        limit = int(input("How many books (default 10, max 40): ").strip() or "10")
-        limit = min(limit, 40)
-    except:
-        limit = 10
+    raw = input("How many books (default 10, max 40): ").strip()
+    limit = int(raw) if raw.isdecimal() else 0
+    limit = min(limit, 40) if limit > 0 else 10
     lang = input("Language code (optional): ").strip()
     api_key = input("Google API key (optional): ").strip()
     print("\n🔍 Searching Google Books...\n")
@@ -181,8 +223,9 @@ def run_interactive():
     if not books:
         print("❌ No books found!\n")
         return
-    save_html(books, query, len(books))
-    save_csv(books, f"google_books_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    save_html(books, query, len(books), timestamp)
+    save_csv(books, f"google_books_{timestamp}.csv")
     print("\n✅ All done!\n")
 
 def main():